@@ -1,12 +1,16 @@
 import os
-import re
+import math
 import time
-import random
 import logging
-import statistics
-from dataclasses import dataclass
+import threading
+import multiprocessing
+import numpy as np
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Union, Tuple
 from flask import Flask, Response
+from waitress import serve
 
 # Configure logging
 logging.basicConfig(
@@ -15,23 +19,225 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mock-exporter')
 
-@dataclass
-class MetricSample:
-    """Represents a single sample value of a metric"""
-    value: float
-    labels: Dict[str, str] = None
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Hashable, order-independent form of a label set: sorted (name, value) pairs
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Characters a sample value may contain; float() parses the rest
+_VALUE_CHARS = frozenset('0123456789+-.eE')
+
+def _is_name(text: str, allow_colon: bool = False) -> bool:
+    """Check text against [a-zA-Z_][a-zA-Z0-9_]* (metric names may also contain ':')"""
+    if allow_colon:
+        text = text.replace(':', '_')
+    return text.isascii() and text.isidentifier()
+
+def _parse_labels(line: str, pos: int) -> Optional[Tuple[LabelKey, int]]:
+    """Scan the label pairs that start at pos (just past '{').
+
+    Returns the labels as a LabelKey and the index just past the closing '}',
+    or None if the label block is malformed or repeats a label name (which
+    Prometheus would reject). Label values are kept in their escaped form.
+    """
+    labels = []
+    length = len(line)
     
-    def __post_init__(self):
-        if self.labels is None:
-            self.labels = {}
+    while True:
+        # Expect a pair, or the closing brace of an empty block or after
+        # a single trailing comma
+        while pos < length and line[pos] == ' ':
+            pos += 1
+        if pos >= length:
+            return None
+        if line[pos] == '}':
+            break
+        
+        eq = line.find('=', pos)
+        if eq < 0 or eq + 1 >= length or line[eq + 1] != '"':
+            return None
+        label_name = line[pos:eq]
+        if not _is_name(label_name):
+            return None
+        
+        # Find the closing quote, stepping over backslash escapes
+        start = eq + 2
+        i = start
+        while True:
+            quote = line.find('"', i)
+            if quote < 0:
+                return None
+            backslash = line.find('\\', i, quote)
+            if backslash < 0:
+                break
+            i = backslash + 2
+        
+        labels.append((label_name, line[start:quote]))
+        pos = quote + 1
+        
+        # Pairs are separated by exactly one comma
+        while pos < length and line[pos] == ' ':
+            pos += 1
+        if pos >= length:
+            return None
+        if line[pos] == '}':
+            break
+        if line[pos] != ',':
+            return None
+        pos += 1
+    
+    label_key = tuple(sorted(labels))
+    # Sorting puts any repeated names next to each other
+    for (name, _), (next_name, _) in zip(label_key, label_key[1:]):
+        if name == next_name:
+            return None
+    return label_key, pos + 1
+
+def _parse_sample(line: str) -> Optional[Tuple[str, LabelKey, float]]:
+    """Parse a sample line into (name, label key, value), or None if malformed.
+
+    Format: name{label="value",...} value [timestamp]
+    or: name value [timestamp]
+    """
+    brace = line.find('{')
+    space = line.find(' ')
+    if space < 0:
+        return None
+    
+    if 0 <= brace < space:
+        name = line[:brace]
+        parsed = _parse_labels(line, brace + 1)
+        if parsed is None:
+            return None
+        label_key, pos = parsed
+        if not line.startswith(' ', pos):
+            return None
+    else:
+        name = line[:space]
+        label_key = ()
+        pos = space
+    
+    if not _is_name(name, allow_colon=True):
+        return None
+    
+    fields = line[pos + 1:].split(' ')
+    if len(fields) > 2:
+        return None
+    if len(fields) == 2 and not (fields[1].isascii() and fields[1].isdigit()):
+        return None
+    
+    # float() also accepts digit separators, non-ASCII digits, surrounding
+    # whitespace and words like 'infinity'; allow only plain decimal syntax
+    if not fields[0] or not _VALUE_CHARS.issuperset(fields[0]):
+        return None
+    try:
+        value = float(fields[0])
+    except ValueError:
+        return None
+    # NaN/Inf are valid exposition values but would poison the statistics
+    if not math.isfinite(value):
+        return None
+    
+    return name, label_key, value
+
+def _format_prefix(name: str, label_key: LabelKey) -> str:
+    """Build the exposition-format series name, e.g. name{k1="v1",k2="v2"}"""
+    if not label_key:
+        return name
+    
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in label_key) + "}"
+
+def _welford_minmax(values) -> Tuple[int, float, float, float, float]:
+    """Return (count, mean, m2, min, max) of values in one Welford pass"""
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    min_value = math.inf
+    max_value = -math.inf
+    for value in values:
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+        if value < min_value:
+            min_value = value
+        if value > max_value:
+            max_value = value
+    
+    return count, mean, m2, min_value, max_value
+
+if numba is not None:
+    _welford_minmax = numba.njit(cache=True)(_welford_minmax)
+
+def _summarize(values: array) -> Tuple[int, float, float, float, float]:
+    """Return (count, mean, m2, min, max) for a buffer of sample values"""
+    # View the buffer as a float64 array without copying
+    data = np.frombuffer(values, dtype=np.float64)
+    if numba is not None:
+        return _welford_minmax(data)
+    
+    # Without the JIT, vectorized reductions beat a Python-level loop
+    mean = data.mean()
+    deviations = data - mean
+    m2 = np.dot(deviations, deviations)
+    return data.size, float(mean), float(m2), float(data.min()), float(data.max())
+
+@dataclass(slots=True)
+class _GroupStats:
+    """Running statistics for the samples of one label combination"""
+    labels: LabelKey
+    output_prefix: str = ''  # Series name with labels, formatted once for scrapes
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared deviations from the mean (Welford)
+    min_value: float = math.inf
+    max_value: float = -math.inf
+    # Sample values not yet folded into the statistics
+    values: array = field(default_factory=lambda: array('d'), repr=False)
+    
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+    
+    def flush(self) -> None:
+        """Fold the buffered sample values into the statistics"""
+        if not self.values:
+            return
+        
+        count, mean, m2, min_value, max_value = _summarize(self.values)
+        self.merge(_GroupStats(
+            labels=self.labels,
+            count=count,
+            mean=mean,
+            m2=m2,
+            min_value=min_value,
+            max_value=max_value
+        ))
+        self.values = array('d')
+    
+    def merge(self, other: '_GroupStats') -> None:
+        """Combine another group's statistics into this one (Chan et al.)"""
+        if not other.count:
+            return
+        
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
 
 @dataclass
 class MetricDefinition:
-    """Represents a Prometheus metric with its metadata and samples"""
+    """Represents a Prometheus metric with its metadata and per-label-group statistics"""
     name: str
     metric_type: str
     help_text: str
-    samples: List[MetricSample]
+    label_groups: Dict[LabelKey, _GroupStats] = field(default_factory=dict)
     min_value: Optional[float] = None
     max_value: Optional[float] = None
     mean_value: Optional[float] = None
@@ -39,19 +245,63 @@ class MetricDefinition:
     is_counter: bool = False
     
     def __post_init__(self):
-        # Calculate statistics for the metric values
-        if self.samples:
-            values = [sample.value for sample in self.samples]
-            self.min_value = min(values)
-            self.max_value = max(values)
-            self.mean_value = statistics.mean(values)
-            if len(values) > 1:
-                self.std_dev = statistics.stdev(values)
-            else:
-                self.std_dev = 0
-                
+        # Calculate statistics for any label groups given up front
+        self._refresh_stats()
+        
         # Determine if it's a counter based on type
         self.is_counter = self.metric_type.lower() == 'counter'
+    
+    def add_sample(self, label_key: LabelKey, value: float) -> None:
+        """Buffer a sample under its label combination; see _refresh_stats()"""
+        group = self.label_groups.get(label_key)
+        if group is None:
+            group = self.label_groups[label_key] = _GroupStats(
+                labels=label_key,
+                output_prefix=_format_prefix(self.name, label_key)
+            )
+        group.values.append(value)
+    
+    def merge(self, other: 'MetricDefinition') -> None:
+        """Combine the label groups of another definition of the same metric"""
+        # Take metadata from whichever file declared it
+        if not self.help_text:
+            self.help_text = other.help_text
+        if not self.metric_type:
+            self.metric_type = other.metric_type
+            self.is_counter = other.is_counter
+        
+        for label_key, other_group in other.label_groups.items():
+            group = self.label_groups.get(label_key)
+            if group is None:
+                group = self.label_groups[label_key] = _GroupStats(
+                    labels=other_group.labels,
+                    output_prefix=other_group.output_prefix
+                )
+            group.merge(other_group)
+        self._refresh_stats()
+    
+    def copy(self) -> 'MetricDefinition':
+        """Return an independent copy that can be merged into without touching this one"""
+        duplicate = MetricDefinition(
+            name=self.name,
+            metric_type=self.metric_type,
+            help_text=self.help_text
+        )
+        duplicate.merge(self)
+        return duplicate
+    
+    def _refresh_stats(self) -> None:
+        """Recompute the metric-wide statistics from the label groups"""
+        total = _GroupStats(labels=())
+        for group in self.label_groups.values():
+            group.flush()
+            total.merge(group)
+        
+        if total.count:
+            self.min_value = total.min_value
+            self.max_value = total.max_value
+            self.mean_value = total.mean
+            self.std_dev = total.std_dev
 
 class PrometheusFileParser:
     """Parses .prom files containing Prometheus metrics"""
@@ -64,97 +314,119 @@ class PrometheusFileParser:
         """Parse the .prom file and return the metrics found"""
         logger.info(f"Parsing file: {self.file_path}")
         
-        with open(self.file_path, 'r') as f:
-            content = f.read()
-            
-        lines = content.strip().split('\n')
         current_metric = None
         
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                # Skip empty lines or process metadata
-                if line.startswith('# HELP '):
-                    parts = line[len('# HELP '):].split(' ', 1)
-                    if len(parts) == 2:
-                        name, help_text = parts
+        # Stream the file rather than reading it whole, so large files are
+        # never held in memory as one string plus a list of lines
+        with open(self.file_path, 'r', buffering=1 << 20) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    # Skip empty lines or process metadata
+                    if line.startswith('# HELP '):
+                        parts = line[len('# HELP '):].split(' ', 1)
+                        if len(parts) == 2:
+                            name, help_text = parts
+                            if name not in self.metrics:
+                                self.metrics[name] = MetricDefinition(
+                                    name=name,
+                                    metric_type='',
+                                    help_text=help_text
+                                )
+                                current_metric = name
+                            else:
+                                self.metrics[name].help_text = help_text
+                        
+                    elif line.startswith('# TYPE '):
+                        parts = line[len('# TYPE '):].split(' ', 1)
+                        if len(parts) == 2:
+                            name, metric_type = parts
+                            if name not in self.metrics:
+                                self.metrics[name] = MetricDefinition(
+                                    name=name,
+                                    metric_type=metric_type,
+                                    help_text=''
+                                )
+                                current_metric = name
+                            else:
+                                self.metrics[name].metric_type = metric_type
+                                self.metrics[name].is_counter = metric_type.lower() == 'counter'
+                else:
+                    # Process metric sample
+                    sample = _parse_sample(line)
+                    
+                    if sample:
+                        name, label_key, value = sample
+                        
+                        # Add or update metric
                         if name not in self.metrics:
                             self.metrics[name] = MetricDefinition(
                                 name=name,
                                 metric_type='',
-                                help_text=help_text,
-                                samples=[]
-                            )
-                            current_metric = name
-                        else:
-                            self.metrics[name].help_text = help_text
-                
-                elif line.startswith('# TYPE '):
-                    parts = line[len('# TYPE '):].split(' ', 1)
-                    if len(parts) == 2:
-                        name, metric_type = parts
-                        if name not in self.metrics:
-                            self.metrics[name] = MetricDefinition(
-                                name=name,
-                                metric_type=metric_type,
-                                help_text='',
-                                samples=[]
+                                help_text=''
                             )
-                            current_metric = name
-                        else:
-                            self.metrics[name].metric_type = metric_type
-            else:
-                # Process metric sample
-                # Format: name{label="value",...} value [timestamp]
-                # or: name value [timestamp]
-                metric_pattern = r'([a-zA-Z_:][a-zA-Z0-9_:]*)'  # Metric name
-                labels_pattern = r'(?:{(.*?)})?'  # Optional labels
-                value_pattern = r'([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)'  # Value
-                timestamp_pattern = r'(?: (\d+))?'  # Optional timestamp
-                
-                pattern = f'^{metric_pattern}{labels_pattern} {value_pattern}{timestamp_pattern}$'
-                match = re.match(pattern, line)
-                
-                if match:
-                    name = match.group(1)
-                    labels_str = match.group(2)
-                    value = float(match.group(3))
-                    
-                    # Parse labels if present
-                    labels = {}
-                    if labels_str:
-                        label_pattern = r'([a-zA-Z_][a-zA-Z0-9_]*)="(.*?)"'
-                        for label_match in re.finditer(label_pattern, labels_str):
-                            label_name, label_value = label_match.groups()
-                            labels[label_name] = label_value
-                    
-                    # Add or update metric
-                    if name not in self.metrics:
-                        self.metrics[name] = MetricDefinition(
-                            name=name,
-                            metric_type='',
-                            help_text='',
-                            samples=[]
-                        )
-                    
-                    self.metrics[name].samples.append(MetricSample(value=value, labels=labels))
+                        
+                        self.metrics[name].add_sample(label_key, value)
         
-        # Post-process metrics to calculate statistics
-        for name, metric in self.metrics.items():
-            if hasattr(metric, '__post_init__'):
-                metric.__post_init__()
+        # Roll the per-label-group statistics up to metric level
+        for metric in self.metrics.values():
+            metric._refresh_stats()
         
         return self.metrics
 
+def _parse_file(file_path: str) -> Dict[str, MetricDefinition]:
+    """Parse one .prom file; module level so worker processes can run it"""
+    return PrometheusFileParser(file_path).parse()
+
+@dataclass
+class _FileCacheEntry:
+    """Parsed metrics of a .prom file, valid while its mtime and size are unchanged"""
+    mtime_ns: int
+    size: int
+    metrics: Dict[str, MetricDefinition]
+
+@dataclass
+class _ScrapeState:
+    """Everything a scrape reads, published by the scanner in a single assignment"""
+    sorted_metrics: List[Tuple[str, MetricDefinition]]  # Output order, sorted once per rescan
+    # Per-series gauge mean/std dev/min/max in output order
+    gauge_params: Tuple[np.ndarray, ...]
+    # Live counter values in output order; written back to counter_state on rescan
+    counter_series: List[Tuple[str, LabelKey]]
+    counter_std_devs: np.ndarray
+    counter_values: np.ndarray
+    # The whole /metrics body with a %r slot per series value, and the
+    # slot positions of the gauge and counter values
+    output_template: str
+    gauge_slots: np.ndarray
+    counter_slots: np.ndarray
+
+_EMPTY_SCRAPE_STATE = _ScrapeState(
+    sorted_metrics=[],
+    gauge_params=(np.empty(0),) * 4,
+    counter_series=[],
+    counter_std_devs=np.empty(0),
+    counter_values=np.empty(0),
+    output_template='',
+    gauge_slots=np.empty(0, dtype=np.intp),
+    counter_slots=np.empty(0, dtype=np.intp)
+)
+
 class MetricGenerator:
     """Generates synthetic metrics based on parsed metric definitions"""
     
     def __init__(self, metrics_dir: str):
         self.metrics_dir = metrics_dir
         self.metrics: Dict[str, MetricDefinition] = {}
-        self.counter_state: Dict[str, Dict[str, float]] = {}  # Stores state for counters
+        self.counter_state: Dict[str, Dict[LabelKey, float]] = {}  # Stores state for counters
         self.scan_interval = 60  # Rescan directory every 60 seconds
         self.last_scan_time = 0
+        self.file_cache: Dict[str, _FileCacheEntry] = {}  # Keyed by file path
+        self.rng = np.random.default_rng()
+        # Swapped wholesale by the scanner; scrapes read it without locking
+        self.state = _EMPTY_SCRAPE_STATE
+        # Serializes advancing counter values against carrying them over on rescan
+        self.counter_lock = threading.Lock()
         
     def scan_directory(self) -> None:
         """Scan directory for .prom files and parse metrics"""
@@ -169,143 +441,239 @@ class MetricGenerator:
         
         # Temporary metrics storage to avoid race conditions
         new_metrics = {}
+        new_file_cache = {}
+        # Metrics in new_metrics that are copies, so safe to merge into
+        combined = set()
         
         try:
-            for filename in os.listdir(self.metrics_dir):
-                if filename.endswith('.prom'):
-                    file_path = os.path.join(self.metrics_dir, filename)
-                    parser = PrometheusFileParser(file_path)
-                    file_metrics = parser.parse()
+            # Reuse the parse of any file unchanged since the last scan
+            stale = {}
+            with os.scandir(self.metrics_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.prom'):
+                        continue
                     
-                    # Merge metrics from this file
-                    for name, metric in file_metrics.items():
-                        if name in new_metrics:
-                            # Combine samples if metric already exists
-                            new_metrics[name].samples.extend(metric.samples)
-                        else:
-                            new_metrics[name] = metric
+                    stat = entry.stat()
+                    cached = self.file_cache.get(entry.path)
+                    if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                        new_file_cache[entry.path] = cached
+                    else:
+                        new_file_cache[entry.path] = None
+                        stale[entry.path] = stat
             
-            # Replace metrics dictionary with new data
-            self.metrics = new_metrics
+            # Parsing is CPU-bound and independent per file, so spread
+            # several changed files across processes. Workers come from a
+            # forkserver: this runs in the scan thread alongside the server's
+            # threads, and fork() from a multi-threaded process can deadlock.
+            paths = list(stale)
+            workers = min(len(paths), os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                ) as executor:
+                    parsed = list(executor.map(_parse_file, paths))
+            else:
+                parsed = [_parse_file(path) for path in paths]
             
-            # Initialize counter state for new metrics
-            for name, metric in self.metrics.items():
-                if metric.is_counter and name not in self.counter_state:
-                    self.counter_state[name] = {}
-                    
-                    # Initialize counter state for each unique label combination
-                    for sample in metric.samples:
-                        label_key = self._labels_to_key(sample.labels)
-                        if label_key not in self.counter_state[name]:
-                            # Start counters at a value within the observed range
-                            if metric.min_value is not None and metric.max_value is not None:
-                                start_value = random.uniform(metric.min_value, metric.max_value)
-                                self.counter_state[name][label_key] = start_value
+            for path, file_metrics in zip(paths, parsed):
+                stat = stale[path]
+                new_file_cache[path] = _FileCacheEntry(stat.st_mtime_ns, stat.st_size, file_metrics)
+            
+            for cached in new_file_cache.values():
+                # Merge metrics from this file
+                for name, metric in cached.metrics.items():
+                    if name in new_metrics:
+                        # Combine statistics if metric already exists, without
+                        # modifying the cached definition it came from
+                        if name not in combined:
+                            new_metrics[name] = new_metrics[name].copy()
+                            combined.add(name)
+                        new_metrics[name].merge(metric)
+                    else:
+                        new_metrics[name] = metric
+            
+            # Lay out everything a scrape needs, then publish it in one assignment
+            sorted_metrics = sorted(new_metrics.items())
+            gauge_params = self._build_gauge_params(sorted_metrics)
+            output_template, gauge_slots, counter_slots = self._build_output_template(sorted_metrics)
+            
+            with self.counter_lock:
+                counter_series, counter_std_devs, counter_values = self._build_counter_params(sorted_metrics)
+                self.state = _ScrapeState(
+                    sorted_metrics=sorted_metrics,
+                    gauge_params=gauge_params,
+                    counter_series=counter_series,
+                    counter_std_devs=counter_std_devs,
+                    counter_values=counter_values,
+                    output_template=output_template,
+                    gauge_slots=gauge_slots,
+                    counter_slots=counter_slots
+                )
+            
+            # Replace metrics dictionary and file cache with new data
+            self.metrics = new_metrics
+            self.file_cache = new_file_cache
         
         except Exception as e:
             logger.error(f"Error scanning directory: {e}")
     
-    def _labels_to_key(self, labels: Dict[str, str]) -> str:
-        """Convert labels dictionary to a string key"""
-        if not labels:
-            return ""
+    def _scan_loop(self) -> None:
+        """Rescan the directory in the background so scrapes never wait on parsing"""
+        while True:
+            time.sleep(self.scan_interval)
+            self.scan_directory()
+    
+    def _build_gauge_params(self, sorted_metrics: List[Tuple[str, MetricDefinition]]) -> Tuple[np.ndarray, ...]:
+        """Lay out mean/std dev/min/max for every gauge series in output order"""
+        means, std_devs, mins, maxs = [], [], [], []
+        for name, metric in sorted_metrics:
+            if metric.is_counter or metric.min_value is None or metric.max_value is None:
+                continue
+            
+            series_count = len(metric.label_groups)
+            means.extend([metric.mean_value] * series_count)
+            std_devs.extend([metric.std_dev or 0.0] * series_count)
+            mins.extend([metric.min_value] * series_count)
+            maxs.extend([metric.max_value] * series_count)
         
-        return ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+        return tuple(
+            np.array(column, dtype=np.float64) for column in (means, std_devs, mins, maxs)
+        )
     
-    def _key_to_labels(self, key: str) -> Dict[str, str]:
-        """Convert a string key back to labels dictionary"""
-        if not key:
-            return {}
+    def _build_counter_params(
+        self, sorted_metrics: List[Tuple[str, MetricDefinition]]
+    ) -> Tuple[List[Tuple[str, LabelKey]], np.ndarray, np.ndarray]:
+        """Lay out std dev and current value for every counter series in output order"""
+        # Carry the values reached so far over into the persistent state
+        state = self.state
+        for (name, label_key), value in zip(state.counter_series, state.counter_values.tolist()):
+            self.counter_state[name][label_key] = value
         
-        labels = {}
-        for item in key.split(","):
-            if "=" in item:
-                k, v = item.split("=", 1)
-                labels[k] = v
+        series, std_devs, values = [], [], []
+        for name, metric in sorted_metrics:
+            if not metric.is_counter or metric.min_value is None or metric.max_value is None:
+                continue
+            
+            counters = self.counter_state.setdefault(name, {})
+            for label_key in metric.label_groups:
+                if label_key not in counters:
+                    # Start counters at a value within the observed range
+                    counters[label_key] = self.rng.uniform(metric.min_value, metric.max_value)
+                
+                series.append((name, label_key))
+                std_devs.append(metric.std_dev or 0.0)
+                values.append(counters[label_key])
         
-        return labels
+        return series, np.array(std_devs, dtype=np.float64), np.array(values, dtype=np.float64)
     
-    def generate_metrics(self) -> str:
-        """Generate synthetic metrics based on parsed definitions"""
-        self.scan_directory()
+    def _build_output_template(
+        self, sorted_metrics: List[Tuple[str, MetricDefinition]]
+    ) -> Tuple[str, np.ndarray, np.ndarray]:
+        """Pre-render the /metrics body with a %r placeholder for every value.
         
-        if not self.metrics:
-            return "# No metrics found\n"
+        Everything but the values only changes on rescan, so it is formatted
+        once here. Returns the template and the placeholder positions of the
+        gauge and counter values, each in the order of their parameter arrays.
+        """
+        parts = []
+        gauge_slots, counter_slots = [], []
         
-        output = []
-        
-        for name, metric in sorted(self.metrics.items()):
+        for name, metric in sorted_metrics:
             # Add metadata
             if metric.help_text:
-                output.append(f"# HELP {name} {metric.help_text}")
+                parts.append(f"# HELP {name} {metric.help_text}\n".replace("%", "%%"))
             if metric.metric_type:
-                output.append(f"# TYPE {name} {metric.metric_type}")
+                parts.append(f"# TYPE {name} {metric.metric_type}\n".replace("%", "%%"))
             
-            # Group samples by unique label combinations
-            label_groups = {}
-            for sample in metric.samples:
-                label_key = self._labels_to_key(sample.labels)
-                if label_key not in label_groups:
-                    label_groups[label_key] = []
-                label_groups[label_key].append(sample.value)
+            if metric.min_value is None or metric.max_value is None:
+                continue
             
-            # Generate a synthetic value for each label combination
-            for label_key, values in label_groups.items():
-                labels = self._key_to_labels(label_key)
-                
-                if metric.is_counter:
-                    # For counters, we need to ensure they always increase
-                    if name in self.counter_state and label_key in self.counter_state[name]:
-                        # Get the current counter value
-                        current_value = self.counter_state[name][label_key]
-                        
-                        # Generate an increment based on the observed data
-                        if metric.std_dev and metric.std_dev > 0:
-                            # Use standard deviation to determine increment
-                            increment = abs(random.gauss(0, metric.std_dev))
-                        else:
-                            # Fallback to a small random increment
-                            increment = random.uniform(0.1, 1.0)
-                        
-                        # Update the counter
-                        new_value = current_value + increment
-                        self.counter_state[name][label_key] = new_value
-                        
-                        # Format the output line
-                        if labels:
-                            labels_str = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
-                            output.append(f"{name}{labels_str} {new_value}")
-                        else:
-                            output.append(f"{name} {new_value}")
-                else:
-                    # For gauges and other metric types, generate a value within the observed range
-                    if metric.min_value is not None and metric.max_value is not None:
-                        if metric.std_dev and metric.std_dev > 0 and metric.mean_value is not None:
-                            # Generate normally distributed values using observed statistics
-                            value = random.gauss(metric.mean_value, metric.std_dev)
-                            # Clamp to min/max range
-                            value = max(min(value, metric.max_value), metric.min_value)
-                        else:
-                            # Fallback to uniform distribution
-                            value = random.uniform(metric.min_value, metric.max_value)
-                        
-                        # Format the output line
-                        if labels:
-                            labels_str = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
-                            output.append(f"{name}{labels_str} {value}")
-                        else:
-                            output.append(f"{name} {value}")
+            # One line per label combination; counters and gauges draw their
+            # values from separate arrays
+            slots = counter_slots if metric.is_counter else gauge_slots
+            for group in metric.label_groups.values():
+                slots.append(len(gauge_slots) + len(counter_slots))
+                parts.append(group.output_prefix.replace("%", "%%") + " %r\n")
+        
+        return (
+            "".join(parts),
+            np.array(gauge_slots, dtype=np.intp),
+            np.array(counter_slots, dtype=np.intp)
+        )
+    
+    def generate_metrics(self) -> str:
+        """Generate synthetic metrics based on parsed definitions"""
+        # Work from one consistent snapshot even if a rescan lands meanwhile
+        state = self.state
+        
+        if not state.sorted_metrics:
+            return "# No metrics found\n"
+        
+        # Draw every gauge value for this scrape in one vectorized call.
+        # A zero std dev means all observed values were equal, so the normal
+        # draw returns that value exactly, same as the uniform fallback would.
+        means, std_devs, mins, maxs = state.gauge_params
+        gauge_values = self.rng.normal(means, std_devs)
+        # Clamp to min/max range
+        np.clip(gauge_values, mins, maxs, out=gauge_values)
+        
+        # Advance every counter in one vectorized draw. Increments come from
+        # the observed std dev, or a small random step where there is none,
+        # and are never negative so counters always increase.
+        std_devs = state.counter_std_devs
+        increments = np.where(
+            std_devs > 0,
+            np.abs(self.rng.normal(0.0, std_devs)),
+            self.rng.uniform(0.1, 1.0, std_devs.size)
+        )
+        with self.counter_lock:
+            # Once a rescan has carried these values into a newer state,
+            # advancing them here would be lost, so report them unchanged
+            if state is self.state:
+                state.counter_values += increments
+            counter_values = state.counter_values.copy()
         
-        return "\n".join(output) + "\n"
+        # Drop the values into their slots in output order and render the
+        # whole body with one format operation
+        values = np.empty(state.gauge_slots.size + state.counter_slots.size)
+        values[state.gauge_slots] = gauge_values
+        values[state.counter_slots] = counter_values
+        return state.output_template % tuple(values.tolist())
 
 app = Flask(__name__)
 metrics_generator = None
 
+# Scrapes within this many seconds of each other get the same body
+response_cache_ttl = 1.0
+# (body, monotonic time it was generated), replaced as a single tuple
+_cached_response: Optional[Tuple[bytes, float]] = None
+# Lets one thread regenerate an expired body while the others wait for it
+_cache_lock = threading.Lock()
+
+def _fresh_cached_body() -> Optional[bytes]:
+    """Return the cached body if it is still within its TTL"""
+    cached = _cached_response
+    if cached is not None and time.monotonic() - cached[1] < response_cache_ttl:
+        return cached[0]
+    return None
+
 @app.route('/metrics')
 def metrics():
     """Endpoint for Prometheus to scrape metrics"""
+    global _cached_response
+    
     if metrics_generator:
-        return Response(metrics_generator.generate_metrics(), mimetype='text/plain')
+        body = _fresh_cached_body()
+        if body is None:
+            with _cache_lock:
+                # Another thread may have regenerated it while we waited
+                body = _fresh_cached_body()
+                if body is None:
+                    # Encode once so every cached response is served as-is
+                    body = metrics_generator.generate_metrics().encode('utf-8')
+                    _cached_response = (body, time.monotonic())
+        return Response(body, mimetype='text/plain')
     return Response("# No metrics found\n", mimetype='text/plain')
 
 @app.route('/health')
@@ -315,21 +683,24 @@ def health():
 
 def main():
     """Main entry point"""
-    global metrics_generator
+    global metrics_generator, response_cache_ttl
     
     metrics_dir = os.environ.get('METRICS_DIR', '/metrics')
     port = int(os.environ.get('PORT', 9090))
+    response_cache_ttl = float(os.environ.get('RESPONSE_CACHE_TTL', response_cache_ttl))
     
     logger.info(f"Starting Prometheus Mock Exporter on port {port}")
     logger.info(f"Monitoring directory: {metrics_dir}")
     
     metrics_generator = MetricGenerator(metrics_dir)
     
-    # Initial scan
+    # Initial scan, then keep rescanning in the background
     metrics_generator.scan_directory()
+    threading.Thread(target=metrics_generator._scan_loop, daemon=True).start()
     
-    # Start Flask app
-    app.run(host='0.0.0.0', port=port)
+    # Serve the Flask app with a threaded production WSGI server so
+    # concurrent scrapes don't queue behind each other
+    serve(app, host='0.0.0.0', port=port, threads=8)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import logging
+import statistics
+import tempfile
+import unittest
+
+from exporter import MetricGenerator
+
+logging.getLogger('mock-exporter').setLevel(logging.WARNING)
+
+class GeneratorTestCase(unittest.TestCase):
+    """Base class providing a temporary metrics directory"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.generator = MetricGenerator(self.tmp.name)
+    
+    def write(self, filename, content):
+        with open(os.path.join(self.tmp.name, filename), 'w') as f:
+            f.write(content)
+    
+    def rescan(self):
+        """Force a rescan regardless of the scan interval"""
+        self.generator.last_scan_time = 0
+        self.generator.scan_directory()
+
+class FileCacheTest(GeneratorTestCase):
+    """Rescans reuse cached parses without corrupting them"""
+    
+    def stats(self, name):
+        metric = self.generator.metrics[name]
+        return (
+            metric.min_value,
+            metric.max_value,
+            metric.mean_value,
+            metric.std_dev,
+            {key: group.count for key, group in metric.label_groups.items()},
+        )
+    
+    def test_unchanged_files_are_not_merged_twice(self):
+        self.write('a.prom', 'temp{room="a"} 1\ntemp{room="b"} 2\n')
+        self.write('b.prom', 'temp{room="a"} 3\ntemp{room="c"} 4\n')
+        
+        self.rescan()
+        first = self.stats('temp')
+        self.assertEqual(sum(first[4].values()), 4)
+        
+        for _ in range(2):
+            self.rescan()
+            self.assertEqual(self.stats('temp'), first)
+        
+        # The cached per-file definitions still hold only their own samples
+        for entry in self.generator.file_cache.values():
+            self.assertEqual(
+                sum(group.count for group in entry.metrics['temp'].label_groups.values()), 2
+            )
+    
+    def test_deleted_file_drops_out(self):
+        self.write('a.prom', 'temp{room="a"} 1\ntemp{room="b"} 2\n')
+        self.write('b.prom', 'temp{room="a"} 3\ntemp{room="c"} 4\nonly_b 1\n')
+        self.rescan()
+        
+        os.remove(os.path.join(self.tmp.name, 'b.prom'))
+        self.rescan()
+        
+        self.assertNotIn('only_b', self.generator.metrics)
+        min_value, max_value, mean_value, std_dev, counts = self.stats('temp')
+        self.assertEqual((min_value, max_value, mean_value), (1.0, 2.0, 1.5))
+        self.assertAlmostEqual(std_dev, statistics.stdev([1, 2]))
+        self.assertEqual(counts, {(('room', 'a'),): 1, (('room', 'b'),): 1})
+        self.assertEqual(list(self.generator.file_cache), [os.path.join(self.tmp.name, 'a.prom')])
+
+def parse_body(body):
+    """Map each series line of a /metrics body to its value"""
+    series = {}
+    for line in body.splitlines():
+        if line and not line.startswith('#'):
+            prefix, value = line.rsplit(' ', 1)
+            series[prefix] = float(value)
+    return series
+
+class CounterCarryOverTest(GeneratorTestCase):
+    """Counter values survive rescans and keep increasing"""
+    
+    def test_counters_stay_monotonic_across_rescan(self):
+        self.write('a.prom', (
+            '# TYPE requests_total counter\n'
+            'requests_total{code="200"} 100\n'
+            'requests_total{code="200"} 160\n'
+            'requests_total{code="500"} 3\n'
+        ))
+        self.rescan()
+        
+        # Advance the counters past their starting values first
+        for _ in range(3):
+            before = parse_body(self.generator.generate_metrics())
+        self.assertEqual(set(before), {'requests_total{code="200"}', 'requests_total{code="500"}'})
+        
+        # Change the file so the rescan re-parses it, adding a label group
+        self.write('a.prom', (
+            '# TYPE requests_total counter\n'
+            'requests_total{code="200"} 100\n'
+            'requests_total{code="200"} 160\n'
+            'requests_total{code="500"} 3\n'
+            'requests_total{code="404"} 7\n'
+        ))
+        self.rescan()
+        
+        after = parse_body(self.generator.generate_metrics())
+        for prefix, value in before.items():
+            self.assertGreaterEqual(after[prefix], value, prefix)
+        self.assertIn('requests_total{code="404"}', after)
+        self.assertGreaterEqual(after['requests_total{code="404"}'], 3)
+        
+        # And they keep advancing from there
+        again = parse_body(self.generator.generate_metrics())
+        for prefix, value in after.items():
+            self.assertGreater(again[prefix], value, prefix)
+
+class OutputTemplateTest(GeneratorTestCase):
+    """Pre-rendered body with per-scrape value slots"""
+    
+    def test_values_land_in_their_own_series(self):
+        # Alternating counters and gauges, with value ranges far apart so a
+        # value scattered into the wrong slot would show
+        self.write('a.prom', (
+            '# HELP a_total Requests served at 100% capacity\n'
+            '# TYPE a_total counter\n'
+            'a_total{path="/x"} 1000\n'
+            'a_total{path="/y"} 2000\n'
+            '# HELP b_ratio Share in %\n'
+            '# TYPE b_ratio gauge\n'
+            'b_ratio{unit="50%"} 0.25\n'
+            'b_ratio{unit="pct"} 0.75\n'
+            '# TYPE c_total counter\n'
+            'c_total 5000\n'
+            '# TYPE d_temp gauge\n'
+            'd_temp{room="a"} -20\n'
+            'd_temp{room="b"} -10\n'
+        ))
+        self.rescan()
+        
+        body = self.generator.generate_metrics()
+        self.assertTrue(body.endswith('\n'))
+        
+        lines = body.splitlines()
+        self.assertEqual([line for line in lines if line.startswith('#')], [
+            '# HELP a_total Requests served at 100% capacity',
+            '# TYPE a_total counter',
+            '# HELP b_ratio Share in %',
+            '# TYPE b_ratio gauge',
+            '# TYPE c_total counter',
+            '# TYPE d_temp gauge',
+        ])
+        
+        series = [line.rsplit(' ', 1) for line in lines if not line.startswith('#')]
+        self.assertEqual([prefix for prefix, _ in series], [
+            'a_total{path="/x"}',
+            'a_total{path="/y"}',
+            'b_ratio{unit="50%"}',
+            'b_ratio{unit="pct"}',
+            'c_total',
+            'd_temp{room="a"}',
+            'd_temp{room="b"}',
+        ])
+        
+        ranges = {'a_total': (1000, 3000), 'b_ratio': (0.25, 0.75), 'c_total': (5000, 6000), 'd_temp': (-20, -10)}
+        for prefix, value in series:
+            low, high = ranges[prefix.split('{')[0]]
+            self.assertTrue(low <= float(value) <= high, f"{prefix} {value}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import re
+import unittest
+
+from exporter import _parse_sample
+
+# The regexes parse() used before the scanner replaced them; kept here as
+# the reference the scanner must agree with on well-formed lines
+_METRIC_RE = re.compile(
+    r'^([a-zA-Z_:][a-zA-Z0-9_:]*)'  # Metric name
+    r'(?:\{(.*?)\})?'  # Optional labels
+    r' ([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)'  # Value
+    r'(?: (\d+))?$'  # Optional timestamp
+)
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def _regex_parse(line):
+    match = _METRIC_RE.match(line)
+    if not match:
+        return None
+    labels = {}
+    if match.group(2):
+        for label_match in _LABEL_RE.finditer(match.group(2)):
+            label_name, label_value = label_match.groups()
+            labels[label_name] = label_value
+    return match.group(1), tuple(sorted(labels.items())), float(match.group(3))
+
+class ParseSampleTest(unittest.TestCase):
+    """Tests for the sample-line scanner"""
+    
+    def test_matches_regex_on_well_formed_lines(self):
+        lines = [
+            'up 1',
+            'up 1 1700000000',
+            'up 0.5',
+            'up .5',
+            'up -3.5',
+            'up +7',
+            'up 1e3',
+            'up -1.5E-3',
+            'ns:metric_total 2',
+            'http_requests_total{method="get",status="200"} 1245.72',
+            'http_requests_total{status="200",method="get"} 1245.72 1700000000',
+            'x{} 2',
+            'x{a="1",} 4',
+            'x{a=""} 4',
+            'x{a="a b"} 9',
+            'x{a="1", b="2"} 9',
+            'x{ a="1" , b="2" } 9',
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertIsNotNone(_regex_parse(line))
+                self.assertEqual(_parse_sample(line), _regex_parse(line))
+    
+    def test_matches_regex_on_rejected_lines(self):
+        lines = [
+            'up',
+            'up ',
+            'up 1 ',
+            'up  1',
+            'up 1 12a',
+            'up 1 2 3',
+            '1up 1',
+            'up-down 1',
+            'x{a="1"}5',
+            'up abc',
+            'up NaN',
+            'up +Inf',
+            'up 1_000',
+            'up \u0661',
+            'up \uff11\uff12',
+            'up \t1',
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertIsNone(_regex_parse(line))
+                self.assertIsNone(_parse_sample(line))
+    
+    def test_labels_are_sorted_into_key(self):
+        self.assertEqual(
+            _parse_sample('m{b="2",a="1"} 3'),
+            ('m', (('a', '1'), ('b', '2')), 3.0)
+        )
+    
+    def test_escaped_quotes_stay_escaped(self):
+        self.assertEqual(
+            _parse_sample(r'm{a="q\"uo,te",b="back\\slash"} 1'),
+            ('m', (('a', r'q\"uo,te'), ('b', r'back\\slash')), 1.0)
+        )
+    
+    def test_brace_inside_label_value(self):
+        self.assertEqual(
+            _parse_sample('m{path="/a}b",x="{"} 1'),
+            ('m', (('path', '/a}b'), ('x', '{')), 1.0)
+        )
+    
+    def test_trailing_dot_value(self):
+        self.assertEqual(_parse_sample('m 1.'), ('m', (), 1.0))
+    
+    def test_rejects_malformed_label_blocks(self):
+        lines = [
+            'm{a = "1"} 1',
+            'm{a=1} 1',
+            'm{a="1" 1',
+            'm{a="1\\"} 1',
+            'm{1a="1"} 1',
+            'm{a="1"',
+            'm{a="1"  b="2"} 1',
+            'm{a="1" b="2"} 1',
+            'm{a="1",,b="2"} 1',
+            'm{a="1",,} 1',
+            'm{,a="1"} 1',
+            'm{,} 1',
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertIsNone(_parse_sample(line))
+    
+    def test_rejects_repeated_label_names(self):
+        self.assertIsNone(_parse_sample('a{x="1",x="2"} 3'))
+        self.assertIsNone(_parse_sample('a{x="1",y="2",x="1"} 3'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import logging
+import statistics
+import tempfile
+import unittest
+from unittest import mock
+
+import exporter
+from exporter import MetricGenerator
+
+logging.getLogger('mock-exporter').setLevel(logging.WARNING)
+
+FILE_A = """\
+# HELP load Load average
+# TYPE load gauge
+load{host="a"} 1.5
+load{host="a"} 2.25
+load{host="b"} 7
+load{host="b"} -3.5
+load{host="c"} 1e3
+"""
+
+FILE_B = """\
+# TYPE load gauge
+load{host="a"} 4
+load{host="b"} 0.125
+load{host="d"} 12
+load{host="d"} 13
+load{host="d"} 11.5
+"""
+
+class MergedStatsTest(unittest.TestCase):
+    """Statistics of a metric split across label groups and files"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for filename, content in (('a.prom', FILE_A), ('b.prom', FILE_B)):
+            with open(os.path.join(self.tmp.name, filename), 'w') as f:
+                f.write(content)
+        
+        self.group_values = {
+            (('host', 'a'),): [1.5, 2.25, 4],
+            (('host', 'b'),): [7, -3.5, 0.125],
+            (('host', 'c'),): [1e3],
+            (('host', 'd'),): [12, 13, 11.5],
+        }
+        self.all_values = [v for values in self.group_values.values() for v in values]
+    
+    def assert_stats_match(self):
+        generator = MetricGenerator(self.tmp.name)
+        generator.scan_directory()
+        metric = generator.metrics['load']
+        
+        self.assertEqual(metric.help_text, 'Load average')
+        self.assertEqual(metric.min_value, min(self.all_values))
+        self.assertEqual(metric.max_value, max(self.all_values))
+        self.assertAlmostEqual(metric.mean_value, statistics.mean(self.all_values))
+        self.assertAlmostEqual(metric.std_dev, statistics.stdev(self.all_values))
+        
+        self.assertEqual(set(metric.label_groups), set(self.group_values))
+        for label_key, values in self.group_values.items():
+            group = metric.label_groups[label_key]
+            self.assertEqual(group.count, len(values))
+            self.assertEqual(group.min_value, min(values))
+            self.assertEqual(group.max_value, max(values))
+            self.assertAlmostEqual(group.mean, statistics.mean(values))
+            expected_std = statistics.stdev(values) if len(values) > 1 else 0
+            self.assertAlmostEqual(group.std_dev, expected_std)
+    
+    def test_with_numba(self):
+        if exporter.numba is None:
+            self.skipTest('numba is not installed')
+        self.assert_stats_match()
+    
+    def test_without_numba(self):
+        with mock.patch.object(exporter, 'numba', None):
+            self.assert_stats_match()
+
+if __name__ == '__main__':
+    unittest.main()